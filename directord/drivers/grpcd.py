@@ -12,28 +12,47 @@
 #   License for the specific language governing permissions and limitations
 #   under the License.
 
+import collections
 from concurrent import futures
 import json
+import logging
 import os
-import queue
 import random
 import threading
-import time
-
-try:
-    import grpc
-    from directord.drivers.generated import msg_pb2
-    from directord.drivers.generated import msg_pb2_grpc
-    from directord.drivers.generated.msg_pb2_grpc import (
-        MessageServiceServicer as grpc_MessageServiceServicer,
-    )
-except (ImportError, ModuleNotFoundError):
-    grpc_MessageServiceServicer = object
-    pass
+
+import tenacity
 
 from directord import drivers
+from directord import logger
 from directord import utils
 
+# gRPC modules are imported on first use, see _require_grpc.
+grpc = None
+msg_pb2 = None
+msg_pb2_grpc = None
+# Response for successful put and purge calls, built once by _require_grpc.
+_OK_STATUS = None
+
+
+def _require_grpc():
+    """Import the gRPC modules.
+
+    The import is deferred until the driver first binds or connects so
+    loading this module does not require, or pay for, the gRPC libraries.
+    """
+
+    global grpc, msg_pb2, msg_pb2_grpc, _OK_STATUS
+    if grpc is None:
+        import grpc as _grpc
+        from directord.drivers.generated import msg_pb2 as _msg_pb2
+        from directord.drivers.generated import (
+            msg_pb2_grpc as _msg_pb2_grpc,
+        )
+
+        msg_pb2, msg_pb2_grpc = _msg_pb2, _msg_pb2_grpc
+        _OK_STATUS = msg_pb2.Status(uuid="uuid!", result=True)
+        grpc = _grpc
+
 
 def parse_args(parser, parser_server, parser_client):
     """Add arguments for this driver to the parser.
@@ -83,18 +102,29 @@ def parse_args(parser, parser_server, parser_client):
         metavar="INTEGER",
         help=("Number of gRPC server workers. Default: %(default)s"),
     )
+    server_group.add_argument(
+        "--grpc-server-max-queue",
+        type=int,
+        default=os.getenv("DIRECTORD_GRPC_SERVER_MAX_QUEUE", 2),
+        metavar="INTEGER",
+        help=(
+            "Number of in flight gRPC requests allowed per server worker"
+            " before new requests are rejected. Set to 0 to disable the"
+            " limit. Default: %(default)s"
+        ),
+    )
     auth_group = parser.add_argument_group("gRPC driver auth options")
     auth_group.add_argument(
         "--grpc-ssl",
         help=("Enable gRPC driver SSL encryption. Default: %(default)s"),
         metavar="BOOLEAN",
-        default=bool(
+        default=utils.str2bool(
             os.getenv(
                 "DIRECTORD_GRPC_SSL",
                 "False",
             )
         ),
-        type=bool,
+        type=utils.str2bool,
     )
     auth_group.add_argument(
         "--grpc-ssl-ca",
@@ -137,10 +167,159 @@ def parse_args(parser, parser_server, parser_client):
     return parser
 
 
+# Options shared by the server and client channels. Connections are long
+# lived and carry many small requests, so keepalive pings are allowed while
+# idle and each channel keeps its own subchannel pool.
+_GRPC_OPTS = (
+    ("grpc.keepalive_time_ms", 30000),
+    ("grpc.keepalive_timeout_ms", 10000),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.max_pings_without_data", 0),
+    ("grpc.http2.min_time_between_pings_ms", 10000),
+    ("grpc.http2.min_ping_interval_without_data_ms", 10000),
+    ("grpc.use_local_subchannel_pool", 1),
+    ("grpc.max_concurrent_streams", 100),
+)
+_rand = random.random
+_CHANNEL_CACHE = dict()
+_SCRATCH = threading.local()
+_CHANNEL_LOCK = threading.Lock()
+_SERVER_EXECUTOR = dict()
+_SERVER_LOCK = threading.Lock()
+
+
+def _acquire_channel(server_address, server_port, secure):
+    """Return a shared channel for a given server.
+
+    Channels are cached per process and reference counted so every client
+    connecting to the same server reuses a single channel rather than
+    paying for a new connection setup. The process id is part of the cache
+    key because channels can not be shared across a fork.
+
+    :param server_address: Server address
+    :type server_address: String
+    :param server_port: Server port
+    :type server_port: Integer
+    :param secure: Enable|Disable secure channels
+    :type secure: Boolean
+    :returns: Tuple
+    """
+
+    key = (server_address, server_port, secure, os.getpid())
+    with _CHANNEL_LOCK:
+        entry = _CHANNEL_CACHE.get(key)
+        if entry is None:
+            entry = _CHANNEL_CACHE[key] = [
+                grpc.insecure_channel(
+                    f"{server_address}:{server_port}", options=_GRPC_OPTS
+                ),
+                0,
+            ]
+        entry[1] += 1
+        return key, entry[0]
+
+
+def _release_channel(key):
+    """Release a shared channel, closing it when no longer referenced.
+
+    :param key: Channel cache key
+    :type key: Tuple
+    """
+
+    with _CHANNEL_LOCK:
+        entry = _CHANNEL_CACHE.get(key)
+        if entry is None:
+            return
+        entry[1] -= 1
+        if entry[1] < 1:
+            del _CHANNEL_CACHE[key]
+            entry[0].close()
+
+
+def _server_executor(max_workers):
+    """Return the process wide executor used by gRPC servers.
+
+    Every server bound within a process shares one thread pool so the
+    number of threads does not grow with the number of drivers. As with
+    channels, the pool is tracked per process id since threads do not
+    survive a fork.
+
+    :param max_workers: Maximum number of worker threads
+    :type max_workers: Integer
+    :returns: Object
+    """
+
+    pid = os.getpid()
+    with _SERVER_LOCK:
+        executor = _SERVER_EXECUTOR.get(pid)
+        if executor is None:
+            executor = _SERVER_EXECUTOR[pid] = futures.ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="grpcd"
+            )
+        return executor
+
+
+def _scratch_request(request_type):
+    """Return the calling thread's cleared request of a given type.
+
+    :param request_type: Request message class.
+    :type request_type: Object
+    :returns: Object
+    """
+
+    requests = getattr(_SCRATCH, "requests", None)
+    if requests is None:
+        requests = _SCRATCH.requests = dict()
+    request = requests.get(request_type)
+    if request is None:
+        request = requests[request_type] = request_type()
+    else:
+        request.Clear()
+    return request
+
+
+def _max_concurrent_rpcs(workers, max_queue):
+    """Return the number of RPCs a server accepts at once.
+
+    :param workers: Number of server workers.
+    :type workers: Integer
+    :param max_queue: In flight requests allowed per worker, 0 or None
+                      disables the limit.
+    :type max_queue: Integer
+    :returns: Integer|None
+    """
+
+    if workers and max_queue and max_queue > 0:
+        return workers * max_queue
+    return None
+
+
+def _overloaded(exc):
+    """Return True when an exception is a server overload rejection.
+
+    :param exc: Exception
+    :type exc: Object
+    :returns: Boolean
+    """
+
+    return (
+        isinstance(exc, grpc.RpcError)
+        and exc.code() == grpc.StatusCode.RESOURCE_EXHAUSTED
+    )
+
+
 class QueueBase(object):
-    """Base queue."""
+    """Base queue.
+
+    Target queues are spread across a fixed number of shards, each with its
+    own dictionary and lock, so that independent targets never contend with
+    one another. Each target queue is a deque; consumers never block on an
+    empty queue, so the atomic append and popleft operations are all that
+    is needed.
+    """
 
     _instance = None
+    _shard_count = 16
 
     def __init__(self):
         """Init."""
@@ -148,8 +327,9 @@ class QueueBase(object):
 
     def _setup(self):
         """Setup queue data."""
-        self._data_queue = {}
-        self._lock = threading.Lock()
+        self._shards = [
+            (dict(), threading.Lock()) for _ in range(self._shard_count)
+        ]
 
     @classmethod
     def instance(cls):
@@ -159,20 +339,31 @@ class QueueBase(object):
             cls._instance._setup()
         return cls._instance
 
-    def get_lock(self):
-        """Get object lock."""
-        return self._lock
+    def _shard(self, target):
+        """Return the shard for a given target.
+
+        :param target: queue target
+        :type target: string
+        :returns: Tuple
+        """
+        return self._shards[hash(target) & (self._shard_count - 1)]
 
     def add_queue(self, target, data):
         """Add data to target queue.
 
+        Dictionary operations are atomic so an existing target queue is
+        used without taking a lock; the shard lock is only held while a new
+        target queue is created.
+
         :param target: String. queue target
         :param data: Object. queue data
         """
-        with self.get_lock():
-            if target not in self._data_queue:
-                self._data_queue[target] = queue.Queue()
-        self._data_queue[target].put(data)
+        data_queue, lock = self._shard(target)
+        q = data_queue.get(target)
+        if q is None:
+            with lock:
+                q = data_queue.setdefault(target, collections.deque())
+        q.append(data)
 
     def get_from_queue(self, target):
         """Get data from top of queue.
@@ -184,13 +375,13 @@ class QueueBase(object):
         :returns: Object
         """
 
-        with self.get_lock():
-            if (
-                target not in self._data_queue
-                or self._data_queue[target].empty()
-            ):
-                return None
-        return self._data_queue[target].get()
+        q = self._shard(target)[0].get(target)
+        if q is None:
+            return None
+        try:
+            return q.popleft()
+        except IndexError:
+            return None
 
     def check_queue(self, target):
         """Check if target has data in queue.
@@ -199,22 +390,28 @@ class QueueBase(object):
         :type target: string
         :returns: boolean
         """
-        with self.get_lock():
-            if target not in self._data_queue:
-                return False
-        return not self._data_queue[target].empty()
+        q = self._shard(target)[0].get(target)
+        return bool(q)
 
     def get_stats(self):
-        """Return queue stats."""
-        stats = {}
-        with self.get_lock():
-            stats["targets"] = self._data_queue.keys()
-        return stats
+        """Return queue stats.
+
+        Targets are returned as a snapshot list; copying a dictionary into
+        a list is atomic so no lock is needed.
+        """
+        return {
+            "targets": [
+                target
+                for data_queue, _ in self._shards
+                for target in list(data_queue)
+            ]
+        }
 
     def purge_queue(self):
         """Empty queue."""
-        with self.get_lock():
-            self._data_queue = {}
+        for data_queue, lock in self._shards:
+            with lock:
+                data_queue.clear()
         return True
 
 
@@ -226,9 +423,15 @@ class JobQueue(QueueBase):
     """Job queue instance."""
 
 
-class MessageServiceServicer(grpc_MessageServiceServicer):
-    def __init__(self, logger):
+class MessageServiceServicer(object):
+    def __init__(self, logger, wake=None):
+        _require_grpc()
         self.log = logger
+        self._wake = wake
+        self._debug = logger.isEnabledFor(logging.DEBUG)
+        self._log_debug = logger.debug
+        self._msgq = MessageQueue.instance()
+        self._jobq = JobQueue.instance()
 
     def GetMessage(self, request, context):
         """Gets a message.
@@ -240,21 +443,23 @@ class MessageServiceServicer(grpc_MessageServiceServicer):
         :returns: MessageResponse
         """
         target = request.target
-        self.log.debug("-> GetMessage Request: %s", request)
+        if self._debug:
+            self._log_debug("-> GetMessage Request: %s", request)
 
-        q = MessageQueue.instance()
         status = True
-        job_data = q.get_from_queue(target)
+        job_data = self._msgq.get_from_queue(target)
 
         if not job_data:
-            self.log.debug("! No messages for %s", target)
+            if self._debug:
+                self._log_debug("! No messages for %s", target)
             status = False
             job_data = None
 
         response = msg_pb2.MessageResponse(
             uuid="uuid!", status=status, target=target, data=job_data
         )
-        self.log.debug("<- GetMessage Response: %s", response)
+        if self._debug:
+            self._log_debug("<- GetMessage Response: %s", response)
         return response
 
     def GetJob(self, request, context):
@@ -267,21 +472,23 @@ class MessageServiceServicer(grpc_MessageServiceServicer):
         :returns: JobResponse
         """
         target = request.target
-        self.log.debug("-> GetJob Request: %s", request)
+        if self._debug:
+            self._log_debug("-> GetJob Request: %s", request)
 
-        q = JobQueue.instance()
         status = True
-        job_data = q.get_from_queue(target)
+        job_data = self._jobq.get_from_queue(target)
 
         if not job_data:
-            self.log.debug("! No jobs for %s", target)
+            if self._debug:
+                self._log_debug("! No jobs for %s", target)
             status = False
             job_data = None
 
         response = msg_pb2.JobResponse(
             uuid="uuid!", status=status, target=target, data=job_data
         )
-        self.log.debug("<- GetJob Response: %s", response)
+        if self._debug:
+            self._log_debug("<- GetJob Response: %s", response)
         return response
 
     def PutMessage(self, request, context):
@@ -296,13 +503,17 @@ class MessageServiceServicer(grpc_MessageServiceServicer):
         target = request.target
         msg = request.data
 
-        self.log.debug("-> PutMessage Request: %s", request)
-        q = MessageQueue.instance()
-        q.add_queue(target, msg)
-        self.log.debug("+ We added message to queue (%s)", target)
-
-        status = msg_pb2.Status(uuid="uuid!", result=True)
-        self.log.debug("<- PutMessage Response: %s", status)
+        if self._debug:
+            self._log_debug("-> PutMessage Request: %s", request)
+        self._msgq.add_queue(target, msg)
+        if self._wake:
+            self._wake("backend", target)
+        if self._debug:
+            self._log_debug("+ We added message to queue (%s)", target)
+
+        status = _OK_STATUS
+        if self._debug:
+            self._log_debug("<- PutMessage Response: %s", status)
         return status
 
     def PutJob(self, request, context):
@@ -317,88 +528,160 @@ class MessageServiceServicer(grpc_MessageServiceServicer):
         target = request.target
         msg = request.data
 
-        self.log.debug("-> PutJob Request: %s", request)
-        q = JobQueue.instance()
-        q.add_queue(target, msg)
-        self.log.debug("+ We added job to queue (%s)", target)
-
-        status = msg_pb2.Status(uuid="uuid!", result=True)
-        self.log.debug("<- PutJob Response: %s", status)
+        if self._debug:
+            self._log_debug("-> PutJob Request: %s", request)
+        self._jobq.add_queue(target, msg)
+        if self._wake:
+            self._wake("job", target)
+        if self._debug:
+            self._log_debug("+ We added job to queue (%s)", target)
+
+        status = _OK_STATUS
+        if self._debug:
+            self._log_debug("<- PutJob Response: %s", status)
         return status
 
+    # MessageCheck and JobCheck are no longer called by the driver, which
+    # fetches work directly, but are kept for older clients.
     def MessageCheck(self, request, context):
         """Check if messages in queue."""
-        self.log.debug("-> Message Check: %s", request.target)
+        if self._debug:
+            self._log_debug("-> Message Check: %s", request.target)
         return msg_pb2.CheckResponse(
             target=request.target,
-            has_data=MessageQueue.instance().check_queue(request.target),
+            has_data=self._msgq.check_queue(request.target),
         )
 
     def JobCheck(self, request, context):
         """Check if jobs in queue."""
-        self.log.debug("-> Job Check: %s", request.target)
+        if self._debug:
+            self._log_debug("-> Job Check: %s", request.target)
         return msg_pb2.CheckResponse(
             target=request.target,
-            has_data=JobQueue.instance().check_queue(request.target),
+            has_data=self._jobq.check_queue(request.target),
         )
 
     def PurgeQueues(self, request, context):
         """Nuke queues."""
         self.log.warning("Purging message and job queues.")
-        MessageQueue.instance().purge_queue()
-        JobQueue.instance().purge_queue()
+        self._msgq.purge_queue()
+        self._jobq.purge_queue()
         # print("++ purging queue")
-        status = msg_pb2.Status(uuid="uuid!", result=True)
+        status = _OK_STATUS
         # print(f"<- Response: {status}")
         return status
 
 
 class MessageServiceClient(object):
-    def __init__(self, logger, server_address, server_port, secure=False):
+    def __init__(
+        self,
+        logger,
+        server_address,
+        server_port,
+        secure=False,
+        max_in_flight=None,
+    ):
         """Initializer.
 
         Creates a gRPC channel for connecting to the server.
         Adds the channel to the generated client stub.
+
+        max_in_flight caps the number of batched requests awaiting a
+        response, matching the server's concurrent RPC limit.
         """
+        _require_grpc()
         self.log = logger
+        self._debug = logger.isEnabledFor(logging.DEBUG)
+        self._log_debug = logger.debug
         self.server_address = server_address
         self.server_port = server_port
         self.secure = secure
+        self.max_in_flight = max_in_flight
         self.channel = None
+        self._channel_key = None
         self.stub = None
         self.connect()
 
     def connect(self):
         """Connect to channel."""
-        # NOTE(mwhahaha): work around for not fork friendly problems
-        if self.channel:
-            del self.channel
-        if self.stub:
-            del self.stub
-
-        wait_for_channel = threading.Event()
-
-        def wait_for_connection(connectivity):
-            self.log.debug("wait_for_connection: %s", connectivity)
-            if connectivity in [grpc.ChannelConnectivity.READY]:
-                wait_for_channel.set()
-
-        self.channel = grpc.insecure_channel(
-            f"{self.server_address}:{self.server_port}"
+        # Release any existing channel so reconnecting never leaks a
+        # channel and its poller threads.
+        self.close()
+        self._channel_key, self.channel = _acquire_channel(
+            self.server_address, self.server_port, self.secure
         )
-        self.channel.subscribe(wait_for_connection, try_to_connect=True)
         self.stub = msg_pb2_grpc.MessageServiceStub(self.channel)
-        self.log.debug("Waiting for channel connectivity...")
-        wait_for_channel.wait()
-        self.log.debug("Channel ready...")
+        if self._debug:
+            self._log_debug("Waiting for channel connectivity...")
+        grpc.channel_ready_future(self.channel).result()
+        if self._debug:
+            self._log_debug("Channel ready...")
 
     def close(self):
-        """Close channels."""
+        """Close channels.
+
+        The channel is shared, so it is only closed once every client using
+        it has been closed.
+        """
         if self.channel:
-            self.channel.close()
+            _release_channel(self._channel_key)
             self.channel = None
         self.stub = None
 
+    @staticmethod
+    @tenacity.retry(
+        retry=tenacity.retry_if_exception(_overloaded),
+        wait=tenacity.wait_exponential(multiplier=0.01, max=1),
+        stop=tenacity.stop_after_attempt(10),
+        reraise=True,
+        before_sleep=tenacity.before_sleep_log(
+            logger.getLogger(name="directord"), logging.WARN
+        ),
+    )
+    def _unary(rpc, request):
+        """Run a unary call, backing off while the server is overloaded.
+
+        :param rpc: Unary stub method.
+        :type rpc: Object
+        :param request: The request message.
+        :type request: Object
+        :returns: Object
+        """
+        return rpc(request)
+
+    @staticmethod
+    def _put_request(request_type, target, scratch=False, **kwargs):
+        """Return a put request.
+
+        Message data fields are assigned directly onto the request and
+        unset (None) fields are skipped entirely, avoiding a standalone
+        MessageData object and the keyword constructor for every put.
+
+        When scratch is enabled the calling thread's request object is
+        cleared and reused rather than allocating a new one. This is only
+        safe for synchronous calls, which serialize the request before
+        returning.
+
+        :param request_type: Request message class.
+        :type request_type: Object
+        :param target: The resource target of the request.
+        :type target: String
+        :param scratch: Reuse the thread local request object.
+        :type scratch: Boolean
+        :returns: Object
+        """
+        if scratch:
+            request = _scratch_request(request_type)
+            request.target = target
+        else:
+            request = request_type(target=target)
+        message = request.data
+        message.SetInParent()
+        for key, value in kwargs.items():
+            if value is not None:
+                setattr(message, key, value)
+        return request
+
     def get_message(self, target):
         """Gets a message for a target.
 
@@ -411,14 +694,17 @@ class MessageServiceClient(object):
         request = msg_pb2.GetMessageRequest(target=target)
 
         try:
-            response = self.stub.GetMessage(request)
-            self.log.debug("get_message: Request OK.")
+            response = self._unary(self.stub.GetMessage, request)
+            if self._debug:
+                self._log_debug("get_message: Request OK.")
             if response.status:
-                self.log.debug("get_message: Message fetched.")
+                if self._debug:
+                    self._log_debug("get_message: Message fetched.")
                 # print(response)
                 return response.target, response.data
             else:
-                self.log.debug("get_message: No message found.")
+                if self._debug:
+                    self._log_debug("get_message: No message found.")
                 # print(response)
                 return target, None
         except grpc.RpcError as err:
@@ -443,14 +729,17 @@ class MessageServiceClient(object):
         request = msg_pb2.GetJobRequest(target=target)
 
         try:
-            response = self.stub.GetJob(request)
-            self.log.debug("get_job: Request OK.")
+            response = self._unary(self.stub.GetJob, request)
+            if self._debug:
+                self._log_debug("get_job: Request OK.")
             if response.status:
-                self.log.debug("get_job: Job fetched.")
+                if self._debug:
+                    self._log_debug("get_job: Job fetched.")
                 # print(response)
                 return response.target, response.data
             else:
-                self.log.debug("get_job: No job found.")
+                if self._debug:
+                    self._log_debug("get_job: No job found.")
                 # print(response)
                 return target, None
         except grpc.RpcError as err:
@@ -489,7 +778,10 @@ class MessageServiceClient(object):
         """
         if not self.stub:
             raise Exception("Message request after close")
-        message = msg_pb2.MessageData(
+        request = self._put_request(
+            request_type=msg_pb2.PutMessageRequest,
+            target=target,
+            scratch=True,
             identity=identity,
             msg_id=msg_id,
             control=control,
@@ -499,12 +791,13 @@ class MessageServiceClient(object):
             stderr=stderr,
             stdout=stdout,
         )
-        request = msg_pb2.PutMessageRequest(target=target, data=message)
-        self.log.debug("put_message: request %s", request)
+        if self._debug:
+            self._log_debug("put_message: request %s", request)
 
         try:
-            response = self.stub.PutMessage(request)
-            self.log.debug("put_message: Message submitted")
+            response = self._unary(self.stub.PutMessage, request)
+            if self._debug:
+                self._log_debug("put_message: Message submitted")
             # print(response)
             return response.result
         except grpc.RpcError as err:
@@ -515,8 +808,35 @@ class MessageServiceClient(object):
                 err.details(),
             )  # pylint: disable=no-member
             self.log.error(err)
+            # The server is still overloaded after backing off, raise so
+            # the caller can retry rather than drop the put.
+            if _overloaded(err):
+                raise
         return False
 
+    def put_messages_batch(self, messages):
+        """Put many messages in queue.
+
+        Up to max_in_flight requests are issued before waiting on any
+        response, so a batch costs one network round trip per
+        max_in_flight messages instead of one per message. The requests
+        are handled concurrently by the server, so the order in which they
+        are queued is not guaranteed.
+
+        :param messages: List of dictionaries, each containing the
+                         arguments accepted by put_message.
+        :type messages: List
+        :returns: List
+        """
+        if not self.stub:
+            raise Exception("Message request after close")
+        return self._put_batch(
+            name="put_messages_batch",
+            rpc=self.stub.PutMessage,
+            request_type=msg_pb2.PutMessageRequest,
+            messages=messages,
+        )
+
     def put_job(
         self,
         target,
@@ -543,7 +863,10 @@ class MessageServiceClient(object):
         """
         if not self.stub:
             raise Exception("Job request after close")
-        job = msg_pb2.MessageData(
+        request = self._put_request(
+            request_type=msg_pb2.PutJobRequest,
+            target=target,
+            scratch=True,
             identity=identity,
             msg_id=msg_id,
             control=control,
@@ -553,12 +876,13 @@ class MessageServiceClient(object):
             stderr=stderr,
             stdout=stdout,
         )
-        request = msg_pb2.PutJobRequest(target=target, data=job)
-        self.log.debug("put_job: request %s", request)
+        if self._debug:
+            self._log_debug("put_job: request %s", request)
 
         try:
-            response = self.stub.PutJob(request)
-            self.log.debug("put_job: Job submitted")
+            response = self._unary(self.stub.PutJob, request)
+            if self._debug:
+                self._log_debug("put_job: Job submitted")
             # print(response)
             return response.result
         except grpc.RpcError as err:
@@ -569,15 +893,108 @@ class MessageServiceClient(object):
                 err.details(),
             )  # pylint: disable=no-member
             self.log.error(err)
+            # The server is still overloaded after backing off, raise so
+            # the caller can retry rather than drop the put.
+            if _overloaded(err):
+                raise
         return False
 
+    def put_jobs_batch(self, jobs):
+        """Put many jobs in queue.
+
+        Up to max_in_flight requests are issued before waiting on any
+        response, so a batch costs one network round trip per
+        max_in_flight jobs instead of one per job. The requests are handled
+        concurrently by the server, so the order in which they are queued
+        is not guaranteed.
+
+        :param jobs: List of dictionaries, each containing the arguments
+                     accepted by put_job.
+        :type jobs: List
+        :returns: List
+        """
+        if not self.stub:
+            raise Exception("Job request after close")
+        return self._put_batch(
+            name="put_jobs_batch",
+            rpc=self.stub.PutJob,
+            request_type=msg_pb2.PutJobRequest,
+            messages=jobs,
+        )
+
+    def _put_batch(self, name, rpc, request_type, messages):
+        """Issue put requests concurrently and collect their results.
+
+        No more than max_in_flight requests are outstanding at once; the
+        oldest call is collected before the next request is issued.
+
+        :param name: Caller name, used for logging.
+        :type name: String
+        :param rpc: Unary stub method.
+        :type rpc: Object
+        :param request_type: Request message class.
+        :type request_type: Object
+        :param messages: List of put argument dictionaries.
+        :type messages: List
+        :returns: List
+        """
+        calls = collections.deque()
+        results = list()
+        for message in messages:
+            if self.max_in_flight and len(calls) >= self.max_in_flight:
+                results.append(self._put_result(name, rpc, *calls.popleft()))
+            request = self._put_request(request_type=request_type, **message)
+            calls.append((request, rpc.future(request)))
+        if self._debug:
+            self._log_debug("%s: %s requests submitted", name, len(messages))
+
+        while calls:
+            results.append(self._put_result(name, rpc, *calls.popleft()))
+        return results
+
+    def _put_result(self, name, rpc, request, call):
+        """Wait for a batched put and return its result.
+
+        A call rejected because the server is overloaded is retried.
+
+        :param name: Caller name, used for logging.
+        :type name: String
+        :param rpc: Unary stub method.
+        :type rpc: Object
+        :param request: Request message.
+        :type request: Object
+        :param call: Future returned by the stub method.
+        :type call: Object
+        :returns: Boolean
+        """
+        try:
+            try:
+                response = call.result()
+            except grpc.RpcError as err:
+                if not _overloaded(err):
+                    raise
+                response = self._unary(rpc, request)
+            return response.result
+        except grpc.RpcError as err:
+            self.log.error(
+                "%s: %s, %s, %s",
+                name,
+                err.code().name,
+                err.code().value,
+                err.details(),
+            )  # pylint: disable=no-member
+            self.log.error(err)
+        return False
+
+    # message_check and job_check are no longer called by the driver, which
+    # fetches work directly, but are kept for older callers.
     def message_check(self, target):
         """Check if messages are in queue."""
         if not self.stub:
             raise Exception("Job request after close")
         request = msg_pb2.CheckRequest(target=target)
         try:
-            response = self.stub.MessageCheck(request)
+            response = self._unary(self.stub.MessageCheck, request)
             # self.log.debug("message_check: %s", response.has_data)
             return response.has_data
         except grpc.RpcError as err:
@@ -596,7 +1013,7 @@ class MessageServiceClient(object):
             raise Exception("Job request after close")
         request = msg_pb2.CheckRequest(target=target)
         try:
-            response = self.stub.JobCheck(request)
+            response = self._unary(self.stub.JobCheck, request)
             # self.log.debug("job_check: %s", response.has_data)
             return response.has_data
         except grpc.RpcError as err:
@@ -630,6 +1047,9 @@ class MessageServiceClient(object):
 
 
 class Driver(drivers.BaseDriver):
+    # Number of consecutive empty polls before the full poll wait is used.
+    _backoff_steps = 5
+
     def __init__(
         self,
         args,
@@ -653,6 +1073,16 @@ class Driver(drivers.BaseDriver):
         # hostname so it shouldn't be possible to end up with a duplicate
         # target that masks the server.
         self._server_identity = "DIRECTORD_SERVER"
+        # Items fetched by a check and handed out by the next receive.
+        self._pending_message = None
+        self._pending_job = None
+        # Consecutive empty polls, used to adapt the poll wait.
+        self._empty_polls = {"backend": 0, "job": 0}
+        # Set when new work arrives, cutting an idle poll wait short.
+        self._wake = {"backend": threading.Event(), "job": threading.Event()}
+        # Poll timeout floor, cached for the last (interval, constant).
+        self._timeout_params = None
+        self._timeout_floor = 0.2
 
         self.args = args
         self.encrypted_traffic_data = encrypted_traffic_data
@@ -694,14 +1124,20 @@ class Driver(drivers.BaseDriver):
         if self._server:
             self.log.debug("Backend already configured, ignoring bind")
             return
+        _require_grpc()
+        # Bound the number of in flight and queued RPCs; once the limit is
+        # reached new calls are rejected with RESOURCE_EXHAUSTED rather
+        # than growing the executor queue without limit.
         self._server = grpc.server(
-            futures.ThreadPoolExecutor(
-                max_workers=self.args.grpc_server_workers
-            )
+            _server_executor(max_workers=self.args.grpc_server_workers),
+            options=_GRPC_OPTS,
+            maximum_concurrent_rpcs=_max_concurrent_rpcs(
+                self.args.grpc_server_workers, self.args.grpc_server_max_queue
+            ),
         )
         # add grpc servicers
         msg_pb2_grpc.add_MessageServiceServicer_to_server(
-            MessageServiceServicer(self.log), self._server
+            MessageServiceServicer(self.log, wake=self.wake), self._server
         )
         # TODO: support ssl
 
@@ -718,7 +1154,16 @@ class Driver(drivers.BaseDriver):
             self.log.debug("Backend already configured, ignoring bind")
             return
         self._client = MessageServiceClient(
-            self.log, self.server_address, self.grpc_port, self.args.grpc_ssl
+            self.log,
+            self.server_address,
+            self.grpc_port,
+            self.args.grpc_ssl,
+            # The server options are only parsed in server mode, clients
+            # leave batches unbounded.
+            max_in_flight=_max_concurrent_rpcs(
+                getattr(self.args, "grpc_server_workers", None),
+                getattr(self.args, "grpc_server_max_queue", None),
+            ),
         )
         if force:
             self._client.connect()
@@ -742,7 +1187,9 @@ class Driver(drivers.BaseDriver):
         :type nonblocking: Boolean
         :returns: Tuple
         """
-        target, data = self._client.get_message(self.identity)
+        data, self._pending_message = self._pending_message, None
+        if data is None:
+            _, data = self._client.get_message(self.identity)
         return_msg = [
             data.msg_id,
             data.control,
@@ -777,6 +1224,9 @@ class Driver(drivers.BaseDriver):
     def backend_check(self, interval=1, constant=1000):
         """Return True if the backend contains work ready.
 
+        The check fetches the next message, which is held for the following
+        backend_recv, so receiving work costs a single round trip.
+
         :param bind: A given Socket bind to identify.
         :type bind: Object
         :param interval: Exponential Interval used to determine the polling
@@ -786,40 +1236,102 @@ class Driver(drivers.BaseDriver):
         :type constant: Integer
         :returns: Object
         """
-        if self._client.message_check(self.identity):
+        if self._pending_message is not None:
             return True
-        # limit checks to 5 per second and add some jitter
-        self.timeout = (
-            max(interval * (constant * 0.001), 0.2)
-            + random.randrange(0, 1000) / 10000
-        )
-        time.sleep(self.timeout)
+        # Work put after this point wakes the following poll wait.
+        self._wake["backend"].clear()
+        try:
+            _, self._pending_message = self._client.get_message(self.identity)
+        except grpc.RpcError:
+            pass
+        else:
+            if self._pending_message is not None:
+                self._empty_polls["backend"] = 0
+                return True
+        self._poll_wait("backend", interval=interval, constant=constant)
         return False
 
+    def _poll_wait(self, kind, interval, constant):
+        """Wait before the next poll of an empty queue.
+
+        The wait adapts to activity: right after work was found the wait
+        is a small fraction of the full poll timeout and it doubles with
+        every consecutive empty poll until it reaches the full timeout.
+        Bursts of work are picked up quickly while an idle driver still
+        polls no more than 5 times per second. The wait ends early when the
+        driver is woken by newly arrived work.
+
+        :param kind: Poll kind, backend or job.
+        :type kind: String
+        :param interval: Exponential Interval used to determine the polling
+                         duration for a given socket.
+        :type interval: Integer
+        :param constant: Constant time used to poll for new jobs.
+        :type constant: Integer
+        """
+        empty_polls = self._empty_polls[kind] = self._empty_polls[kind] + 1
+        if self._timeout_params != (interval, constant):
+            # limit idle checks to 5 per second
+            self._timeout_floor = max(interval * constant * 0.001, 0.2)
+            self._timeout_params = (interval, constant)
+        self.timeout = (self._timeout_floor + _rand() * 0.1) / (
+            1 << max(self._backoff_steps - empty_polls, 0)
+        )
+        self._wake[kind].wait(self.timeout)
+
+    def wake(self, kind, target=None):
+        """Interrupt an idle poll wait so work is checked immediately.
+
+        :param kind: Poll kind that received work, backend for messages or
+                     job for jobs.
+        :type kind: String
+        :param target: Target that received work. When set, only a driver
+                       polling for that target is woken.
+        :type target: String
+        """
+        if target is None or target == self.identity:
+            self._wake[kind].set()
+
+    def _put_kwargs(self, **kwargs):
+        """Return the put arguments for a send request.
+
+        :returns: Dictionary
+        """
+        # target defaults to server if identity not specified
+        return dict(
+            target=kwargs.get(
+                "target", kwargs.get("identity", self._server_identity)
+            ),
+            identity=kwargs.get("identity", self.identity),
+            msg_id=kwargs.get("msg_id"),
+            control=kwargs.get("control"),
+            command=kwargs.get("command"),
+            data=kwargs.get("data"),
+            info=kwargs.get("info"),
+            stderr=kwargs.get("stderr"),
+            stdout=kwargs.get("stdout"),
+        )
+
     def backend_send(self, *args, **kwargs):
         """Send a job message.
 
         * All args and kwargs are passed through to the socket send.
 
+        When the `batch` kwarg is a list of kwarg dictionaries, every
+        message in the list is sent concurrently, limited to the server's
+        concurrent RPC limit. An empty batch sends nothing.
+
         :returns: Object
         """
-        # target defaults to server if identity not specified
-        identity = kwargs.get("identity", self.identity)
-        target = kwargs.get(
-            "target", kwargs.get("identity", self._server_identity)
-        )
+        batch = kwargs.get("batch")
         try:
-            self._client.put_message(
-                target=target,
-                identity=identity,
-                msg_id=kwargs.get("msg_id"),
-                control=kwargs.get("control"),
-                command=kwargs.get("command"),
-                data=kwargs.get("data"),
-                info=kwargs.get("info"),
-                stderr=kwargs.get("stderr"),
-                stdout=kwargs.get("stdout"),
-            )
+            if batch is not None:
+                if batch:
+                    self._client.put_messages_batch(
+                        [self._put_kwargs(**i) for i in batch]
+                    )
+            else:
+                self._client.put_message(**self._put_kwargs(**kwargs))
         except Exception as e:
             self.log.error("Error putting message, %s", e)
             raise
@@ -879,25 +1391,21 @@ class Driver(drivers.BaseDriver):
 
         * All args and kwargs are passed through to the socket send.
 
+        When the `batch` kwarg is a list of kwarg dictionaries, every job
+        in the list is sent concurrently, limited to the server's
+        concurrent RPC limit. An empty batch sends nothing.
+
         :returns: Object
         """
-        # target defaults to server if identity not specified
-        identity = kwargs.get("identity", self.identity)
-        target = kwargs.get(
-            "target", kwargs.get("identity", self._server_identity)
-        )
+        batch = kwargs.get("batch")
         try:
-            self._client.put_job(
-                target=target,
-                identity=identity,
-                msg_id=kwargs.get("msg_id"),
-                control=kwargs.get("control"),
-                command=kwargs.get("command"),
-                data=kwargs.get("data"),
-                info=kwargs.get("info"),
-                stderr=kwargs.get("stderr"),
-                stdout=kwargs.get("stdout"),
-            )
+            if batch is not None:
+                if batch:
+                    self._client.put_jobs_batch(
+                        [self._put_kwargs(**i) for i in batch]
+                    )
+            else:
+                self._client.put_job(**self._put_kwargs(**kwargs))
         except Exception as e:
             self.log.error("Error putting message, %s", e)
             raise
@@ -911,7 +1419,9 @@ class Driver(drivers.BaseDriver):
         :returns: Tuple
         """
 
-        target, data = self._client.get_job(self.identity)
+        data, self._pending_job = self._pending_job, None
+        if data is None:
+            _, data = self._client.get_job(self.identity)
         return_msg = [
             data.msg_id,
             data.control,
@@ -946,6 +1456,9 @@ class Driver(drivers.BaseDriver):
     def job_check(self, interval=1, constant=1000):
         """Return True if a job contains work ready.
 
+        The check fetches the next job, which is held for the following
+        job_recv, so receiving work costs a single round trip.
+
         :param bind: A given Socket bind to identify.
         :type bind: Object
         :param interval: Exponential Interval used to determine the polling
@@ -955,12 +1468,17 @@ class Driver(drivers.BaseDriver):
         :type constant: Integer
         :returns: Object
         """
-        if self._client.job_check(self.identity):
+        if self._pending_job is not None:
             return True
-        # limit checks to 5 per second and add some jitter
-        self.timeout = (
-            max(interval * (constant * 0.001), 0.2)
-            + random.randrange(0, 1000) / 10000
-        )
-        time.sleep(self.timeout)
+        # Work put after this point wakes the following poll wait.
+        self._wake["job"].clear()
+        try:
+            _, self._pending_job = self._client.get_job(self.identity)
+        except grpc.RpcError:
+            pass
+        else:
+            if self._pending_job is not None:
+                self._empty_polls["job"] = 0
+                return True
+        self._poll_wait("job", interval=interval, constant=constant)
         return False
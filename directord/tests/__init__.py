@@ -94,18 +94,35 @@ options:
 """
 
 
+_FAKE_COMM_RESULT = ("stdout", "stderr")
+
+
+_MOCK_RECV_CHUNK = b"return data"
+
+
 class FakePopen:
     """Fake Shell Commands."""
 
+    __slots__ = ("returncode",)
+
     def __init__(self, return_code=0, *args, **kwargs):
         self.returncode = return_code
 
     @staticmethod
     def communicate():
-        return "stdout", "stderr"
+        return _FAKE_COMM_RESULT
 
 
 class FakeStat:
+    __slots__ = (
+        "st_uid",
+        "st_gid",
+        "st_size",
+        "st_mtime",
+        "st_mode",
+        "st_atime",
+    )
+
     def __init__(self, uid, gid):
         self.st_uid = uid
         self.st_gid = gid
@@ -145,9 +162,14 @@ class FakeArgs:
     machine_id = None
 
 
+FAKE_ARGS = FakeArgs()
+
+
 class MockSocket:
+    __slots__ = ("_recv_iter",)
+
     def __init__(self, *args, **kwargs):
-        self.chunk_returned = False
+        self._recv_iter = iter((_MOCK_RECV_CHUNK,))
 
     def sendall(self, *args, **kwargs):
         pass
@@ -156,9 +178,7 @@ class MockSocket:
         pass
 
     def recv(self, *args, **kwargs):
-        if not self.chunk_returned:
-            self.chunk_returned = True
-            return b"return data"
+        return next(self._recv_iter, b"")
 
     def close(self):
         pass
@@ -246,7 +266,7 @@ class TestDriverBase(unittest.TestCase):
     def setUp(self):
         self.zmq = zmq.Driver
         self.messaging = messaging.Driver
-        base_driver = drivers.BaseDriver(args=FakeArgs())
+        base_driver = drivers.BaseDriver(args=FAKE_ARGS)
         self.mock_driver_patched = patch(
             "directord.drivers.BaseDriver",
             autospec=True,
@@ -0,0 +1,665 @@
+#   Copyright Alex Schultz <aschultz@redhat.com>. All Rights Reserved.
+#
+#   Licensed under the Apache License, Version 2.0 (the "License"); you may
+#   not use this file except in compliance with the License. You may obtain
+#   a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#   WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#   License for the specific language governing permissions and limitations
+#   under the License.
+
+import argparse
+import threading
+import unittest
+
+from unittest.mock import ANY
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import grpc
+
+from directord import main
+from directord import tests
+from directord.drivers import grpcd
+from directord.drivers.generated import msg_pb2
+
+
+class TestQueueBase(unittest.TestCase):
+    def setUp(self):
+        grpcd.MessageQueue._instance = None
+        self.queue = grpcd.MessageQueue.instance()
+
+    def tearDown(self):
+        grpcd.MessageQueue._instance = None
+
+    def test_instance(self):
+        self.assertIs(self.queue, grpcd.MessageQueue.instance())
+        self.assertIsNot(self.queue, grpcd.JobQueue.instance())
+
+    def test_init(self):
+        self.assertRaises(RuntimeError, grpcd.MessageQueue)
+
+    def test_add_get_queue(self):
+        self.queue.add_queue("test-node", "data0")
+        self.queue.add_queue("test-node", "data1")
+        self.assertEqual(self.queue.get_from_queue("test-node"), "data0")
+        self.assertEqual(self.queue.get_from_queue("test-node"), "data1")
+        self.assertIsNone(self.queue.get_from_queue("test-node"))
+
+    def test_get_from_queue_missing(self):
+        self.assertIsNone(self.queue.get_from_queue("test-node"))
+
+    def test_check_queue(self):
+        self.assertFalse(self.queue.check_queue("test-node"))
+        self.queue.add_queue("test-node", "data")
+        self.assertTrue(self.queue.check_queue("test-node"))
+        self.queue.get_from_queue("test-node")
+        self.assertFalse(self.queue.check_queue("test-node"))
+
+    def test_get_stats(self):
+        self.queue.add_queue("test-node0", "data")
+        self.queue.add_queue("test-node1", "data")
+        self.assertEqual(
+            sorted(self.queue.get_stats()["targets"]),
+            ["test-node0", "test-node1"],
+        )
+
+    def test_get_stats_snapshot(self):
+        self.queue.add_queue("test-node0", "data")
+        stats = self.queue.get_stats()
+        self.queue.add_queue("test-node1", "data")
+        self.assertIsInstance(stats["targets"], list)
+        self.assertEqual(stats["targets"], ["test-node0"])
+
+    def test_purge_queue(self):
+        self.queue.add_queue("test-node", "data")
+        self.assertTrue(self.queue.purge_queue())
+        self.assertFalse(self.queue.check_queue("test-node"))
+        self.assertEqual(list(self.queue.get_stats()["targets"]), [])
+
+    def test_shard(self):
+        data_queue, _ = self.queue._shard("test-node")
+        self.queue.add_queue("test-node", "data")
+        self.assertIn("test-node", data_queue)
+        self.assertIs(self.queue._shard("test-node")[0], data_queue)
+
+
+class FakeRpcError(grpc.RpcError):
+    def __init__(self, code):
+        self._code = code
+
+    def code(self):
+        return self._code
+
+    def details(self):
+        return "details"
+
+
+class TestParseArgs(unittest.TestCase):
+    def _parse(self, *args):
+        parser = argparse.ArgumentParser()
+        grpcd.parse_args(parser, parser, parser)
+        return parser.parse_args(list(args))
+
+    def test_grpc_ssl_default(self):
+        with patch.dict("os.environ", {}, clear=True):
+            self.assertFalse(self._parse().grpc_ssl)
+
+    def test_grpc_ssl_env(self):
+        with patch.dict("os.environ", {"DIRECTORD_GRPC_SSL": "False"}):
+            self.assertFalse(self._parse().grpc_ssl)
+        with patch.dict("os.environ", {"DIRECTORD_GRPC_SSL": "true"}):
+            self.assertTrue(self._parse().grpc_ssl)
+
+    def test_grpc_ssl_arg(self):
+        self.assertFalse(self._parse("--grpc-ssl", "false").grpc_ssl)
+        self.assertTrue(self._parse("--grpc-ssl", "yes").grpc_ssl)
+
+
+class TestRequireGrpc(unittest.TestCase):
+    def test_require_grpc(self):
+        grpcd._require_grpc()
+        self.assertIs(grpcd.grpc, grpc)
+        self.assertIs(grpcd.msg_pb2, msg_pb2)
+        self.assertIsNotNone(grpcd.msg_pb2_grpc)
+
+
+class TestChannelCache(unittest.TestCase):
+    def setUp(self):
+        grpcd._require_grpc()
+
+    def tearDown(self):
+        grpcd._CHANNEL_CACHE.clear()
+
+    @patch("grpc.insecure_channel", autospec=True)
+    def test_acquire_release_channel(self, mock_channel):
+        key0, channel0 = grpcd._acquire_channel("localhost", 5558, False)
+        key1, channel1 = grpcd._acquire_channel("localhost", 5558, False)
+        self.assertEqual(key0, key1)
+        self.assertIs(channel0, channel1)
+        mock_channel.assert_called_once_with(
+            "localhost:5558", options=grpcd._GRPC_OPTS
+        )
+        grpcd._release_channel(key0)
+        channel0.close.assert_not_called()
+        grpcd._release_channel(key1)
+        channel0.close.assert_called_once()
+        self.assertNotIn(key0, grpcd._CHANNEL_CACHE)
+
+    @patch("grpc.insecure_channel", autospec=True)
+    def test_acquire_channel_unique(self, mock_channel):
+        key0, _ = grpcd._acquire_channel("localhost", 5558, False)
+        key1, _ = grpcd._acquire_channel("localhost", 5559, False)
+        self.assertNotEqual(key0, key1)
+        self.assertEqual(mock_channel.call_count, 2)
+
+
+class TestServerExecutor(unittest.TestCase):
+    def tearDown(self):
+        for executor in grpcd._SERVER_EXECUTOR.values():
+            executor.shutdown(wait=False)
+        grpcd._SERVER_EXECUTOR.clear()
+
+    def test_server_executor(self):
+        executor = grpcd._server_executor(max_workers=4)
+        self.assertIs(executor, grpcd._server_executor(max_workers=4))
+        self.assertEqual(executor._max_workers, 4)
+        self.assertEqual(executor._thread_name_prefix, "grpcd")
+
+
+class TestMessageServiceServicer(unittest.TestCase):
+    def setUp(self):
+        grpcd.MessageQueue._instance = None
+        grpcd.JobQueue._instance = None
+        self.servicer = grpcd.MessageServiceServicer(MagicMock())
+
+    def tearDown(self):
+        grpcd.MessageQueue._instance = None
+        grpcd.JobQueue._instance = None
+
+    def test_queue_instances(self):
+        self.assertIs(self.servicer._msgq, grpcd.MessageQueue.instance())
+        self.assertIs(self.servicer._jobq, grpcd.JobQueue.instance())
+
+    def test_put_get_message(self):
+        request = msg_pb2.PutMessageRequest(
+            target="test-node", data=msg_pb2.MessageData(msg_id="a")
+        )
+        status = self.servicer.PutMessage(request, None)
+        self.assertTrue(status.result)
+        check = self.servicer.MessageCheck(
+            msg_pb2.CheckRequest(target="test-node"), None
+        )
+        self.assertTrue(check.has_data)
+        response = self.servicer.GetMessage(
+            msg_pb2.GetMessageRequest(target="test-node"), None
+        )
+        self.assertTrue(response.status)
+        self.assertEqual(response.data.msg_id, "a")
+        response = self.servicer.GetMessage(
+            msg_pb2.GetMessageRequest(target="test-node"), None
+        )
+        self.assertFalse(response.status)
+
+    def test_put_wake(self):
+        wake = MagicMock()
+        servicer = grpcd.MessageServiceServicer(MagicMock(), wake=wake)
+        servicer.PutMessage(msg_pb2.PutMessageRequest(target="a"), None)
+        servicer.PutJob(msg_pb2.PutJobRequest(target="b"), None)
+        self.assertEqual(
+            wake.call_args_list,
+            [
+                unittest.mock.call("backend", "a"),
+                unittest.mock.call("job", "b"),
+            ],
+        )
+
+    def test_put_get_job(self):
+        request = msg_pb2.PutJobRequest(
+            target="test-node", data=msg_pb2.MessageData(msg_id="a")
+        )
+        self.assertTrue(self.servicer.PutJob(request, None).result)
+        check = self.servicer.JobCheck(
+            msg_pb2.CheckRequest(target="test-node"), None
+        )
+        self.assertTrue(check.has_data)
+        response = self.servicer.GetJob(
+            msg_pb2.GetJobRequest(target="test-node"), None
+        )
+        self.assertEqual(response.data.msg_id, "a")
+
+    def test_put_status(self):
+        status0 = self.servicer.PutMessage(
+            msg_pb2.PutMessageRequest(target="test-node"), None
+        )
+        status1 = self.servicer.PutJob(
+            msg_pb2.PutJobRequest(target="test-node"), None
+        )
+        self.assertIs(status0, grpcd._OK_STATUS)
+        self.assertIs(status1, grpcd._OK_STATUS)
+        self.assertEqual(status0.uuid, "uuid!")
+
+    def test_purge_queues(self):
+        self.servicer.PutJob(msg_pb2.PutJobRequest(target="test-node"), None)
+        self.servicer.PurgeQueues(msg_pb2.BasicRequest(), None)
+        check = self.servicer.JobCheck(
+            msg_pb2.CheckRequest(target="test-node"), None
+        )
+        self.assertFalse(check.has_data)
+
+
+class TestMessageServiceClient(unittest.TestCase):
+    def setUp(self):
+        with patch.object(grpcd.MessageServiceClient, "connect"):
+            self.client = grpcd.MessageServiceClient(
+                MagicMock(), "localhost", 5558
+            )
+        self.client.stub = MagicMock()
+
+    def test_put_messages_batch(self):
+        call = MagicMock()
+        call.result.return_value.result = True
+        self.client.stub.PutMessage.future.return_value = call
+        results = self.client.put_messages_batch(
+            [
+                {"target": "test-node0", "identity": "test", "msg_id": "a"},
+                {"target": "test-node1", "identity": "test", "msg_id": "b"},
+            ]
+        )
+        self.assertEqual(results, [True, True])
+        self.assertEqual(self.client.stub.PutMessage.future.call_count, 2)
+        self.client.stub.PutMessage.assert_not_called()
+        request = self.client.stub.PutMessage.future.call_args[0][0]
+        self.assertEqual(request.target, "test-node1")
+        self.assertEqual(request.data.msg_id, "b")
+
+    def test_put_messages_batch_window(self):
+        in_flight = list()
+        peak = list()
+
+        def _future(request):
+            def _result():
+                in_flight.remove(request)
+                return MagicMock(result=True)
+
+            in_flight.append(request)
+            peak.append(len(in_flight))
+            return MagicMock(result=MagicMock(side_effect=_result))
+
+        self.client.max_in_flight = 2
+        self.client.stub.PutMessage.future.side_effect = _future
+        results = self.client.put_messages_batch(
+            [{"target": "test-node", "identity": "test"}] * 5
+        )
+        self.assertEqual(results, [True] * 5)
+        self.assertEqual(max(peak), 2)
+        self.assertEqual(in_flight, [])
+
+    def test_put_jobs_batch(self):
+        call = MagicMock()
+        call.result.return_value.result = True
+        self.client.stub.PutJob.future.return_value = call
+        results = self.client.put_jobs_batch(
+            [{"target": "test-node", "identity": "test"}]
+        )
+        self.assertEqual(results, [True])
+        self.client.stub.PutJob.future.assert_called_once()
+
+    @patch("grpc.channel_ready_future", autospec=True)
+    @patch("grpc.insecure_channel", autospec=True)
+    def test_connect_reconnect(self, mock_channel, mock_ready):
+        self.client.connect()
+        channel = self.client.channel
+        key = self.client._channel_key
+        self.assertEqual(grpcd._CHANNEL_CACHE[key][1], 1)
+        self.client.connect()
+        channel.close.assert_called_once()
+        self.assertEqual(grpcd._CHANNEL_CACHE[key][1], 1)
+        self.client.close()
+        self.assertIsNone(self.client.channel)
+        self.assertIsNone(self.client.stub)
+        self.assertNotIn(key, grpcd._CHANNEL_CACHE)
+
+    def test_put_message(self):
+        self.client.stub.PutMessage.return_value.result = True
+        self.assertTrue(
+            self.client.put_message(
+                target="test-node", identity="test", msg_id="a"
+            )
+        )
+        request = self.client.stub.PutMessage.call_args[0][0]
+        self.assertEqual(request.target, "test-node")
+        self.assertTrue(request.HasField("data"))
+        self.assertEqual(request.data.identity, "test")
+        self.assertEqual(request.data.msg_id, "a")
+        self.assertEqual(request.data.command, "")
+
+    def test_put_message_scratch(self):
+        self.client.stub.PutMessage.return_value.result = True
+        self.client.put_message(
+            target="test-node0", identity="test", msg_id="a", command="RUN"
+        )
+        request0 = self.client.stub.PutMessage.call_args[0][0]
+        self.client.put_message(target="test-node1", identity="test")
+        request1 = self.client.stub.PutMessage.call_args[0][0]
+        self.assertIs(request0, request1)
+        self.assertEqual(request1.target, "test-node1")
+        self.assertEqual(request1.data.msg_id, "")
+        self.assertEqual(request1.data.command, "")
+
+    def test_scratch_request_thread_local(self):
+        requests = list()
+        thread = threading.Thread(
+            target=lambda: requests.append(
+                grpcd._scratch_request(msg_pb2.PutJobRequest)
+            )
+        )
+        thread.start()
+        thread.join()
+        self.assertIsNot(
+            requests[0], grpcd._scratch_request(msg_pb2.PutJobRequest)
+        )
+
+    def test_put_job(self):
+        self.client.stub.PutJob.return_value.result = True
+        self.assertTrue(self.client.put_job(target="test-node", identity=None))
+        request = self.client.stub.PutJob.call_args[0][0]
+        self.assertTrue(request.HasField("data"))
+        self.assertEqual(request.data.identity, "")
+
+    def test_unary_overloaded(self):
+        rpc = MagicMock(
+            side_effect=[
+                FakeRpcError(grpc.StatusCode.RESOURCE_EXHAUSTED),
+                "response",
+            ]
+        )
+        self.assertEqual(self.client._unary(rpc, "request"), "response")
+        self.assertEqual(rpc.call_count, 2)
+
+    @patch("time.sleep", autospec=True)
+    def test_put_message_overloaded(self, mock_sleep):
+        self.client.stub.PutMessage.side_effect = FakeRpcError(
+            grpc.StatusCode.RESOURCE_EXHAUSTED
+        )
+        self.assertRaises(
+            grpc.RpcError,
+            self.client.put_message,
+            target="test-node",
+            identity="test",
+        )
+        self.assertEqual(self.client.stub.PutMessage.call_count, 10)
+
+    @patch("time.sleep", autospec=True)
+    def test_put_job_overloaded(self, mock_sleep):
+        self.client.stub.PutJob.side_effect = FakeRpcError(
+            grpc.StatusCode.RESOURCE_EXHAUSTED
+        )
+        self.assertRaises(
+            grpc.RpcError,
+            self.client.put_job,
+            target="test-node",
+            identity="test",
+        )
+
+    def test_put_message_error(self):
+        self.client.stub.PutMessage.side_effect = FakeRpcError(
+            grpc.StatusCode.UNAVAILABLE
+        )
+        self.assertFalse(
+            self.client.put_message(target="test-node", identity="test")
+        )
+
+    def test_unary_error(self):
+        rpc = MagicMock(side_effect=FakeRpcError(grpc.StatusCode.UNAVAILABLE))
+        self.assertRaises(grpc.RpcError, self.client._unary, rpc, "request")
+        rpc.assert_called_once_with("request")
+
+    def test_put_messages_batch_overloaded(self):
+        call = MagicMock()
+        call.result.side_effect = FakeRpcError(
+            grpc.StatusCode.RESOURCE_EXHAUSTED
+        )
+        self.client.stub.PutMessage.future.return_value = call
+        self.client.stub.PutMessage.return_value.result = True
+        results = self.client.put_messages_batch(
+            [{"target": "test-node", "identity": "test"}]
+        )
+        self.assertEqual(results, [True])
+        self.client.stub.PutMessage.assert_called_once()
+
+    def test_message_check_overloaded(self):
+        self.client.stub.MessageCheck.side_effect = [
+            FakeRpcError(grpc.StatusCode.RESOURCE_EXHAUSTED),
+            MagicMock(has_data=True),
+        ]
+        self.assertTrue(self.client.message_check("test-node"))
+        self.assertEqual(self.client.stub.MessageCheck.call_count, 2)
+
+    def test_job_check(self):
+        self.client.stub.JobCheck.return_value.has_data = False
+        self.assertFalse(self.client.job_check("test-node"))
+        self.client.stub.JobCheck.assert_called_once()
+
+    def test_put_messages_batch_closed(self):
+        self.client.stub = None
+        self.assertRaises(
+            Exception, self.client.put_messages_batch, [{"target": "test"}]
+        )
+
+
+class TestDriverGrpcd(unittest.TestCase):
+    def setUp(self):
+        args = tests.FakeArgs()
+        args.driver = "grpcd"
+        args.grpc_port = 5558
+        args.grpc_server_address = "localhost"
+        args.grpc_ssl = False
+        with patch.object(
+            grpcd.Driver, "get_machine_id"
+        ) as mock_get_machine_id:
+            mock_get_machine_id.return_value = "XXX123"
+            self.driver = grpcd.Driver(args=args)
+        self.driver._client = MagicMock()
+        grpcd._require_grpc()
+
+    def tearDown(self):
+        for executor in grpcd._SERVER_EXECUTOR.values():
+            executor.shutdown(wait=False)
+        grpcd._SERVER_EXECUTOR.clear()
+
+    def test_backend_send(self):
+        self.driver.backend_send(identity="test-node", msg_id="a")
+        self.driver._client.put_message.assert_called_once_with(
+            target="test-node",
+            identity="test-node",
+            msg_id="a",
+            control=None,
+            command=None,
+            data=None,
+            info=None,
+            stderr=None,
+            stdout=None,
+        )
+
+    def test_backend_send_batch(self):
+        self.driver.backend_send(
+            batch=[{"identity": "test-node0"}, {"identity": "test-node1"}]
+        )
+        self.driver._client.put_message.assert_not_called()
+        batch = self.driver._client.put_messages_batch.call_args[0][0]
+        self.assertEqual(
+            [i["target"] for i in batch], ["test-node0", "test-node1"]
+        )
+
+    def test_backend_send_overloaded(self):
+        self.driver._client.put_message.side_effect = FakeRpcError(
+            grpc.StatusCode.RESOURCE_EXHAUSTED
+        )
+        self.assertRaises(
+            grpc.RpcError, self.driver.backend_send, identity="test-node"
+        )
+
+    def test_send_empty_batch(self):
+        self.assertTrue(self.driver.backend_send(batch=[]))
+        self.assertTrue(self.driver.job_send(batch=[]))
+        self.driver._client.put_message.assert_not_called()
+        self.driver._client.put_messages_batch.assert_not_called()
+        self.driver._client.put_job.assert_not_called()
+        self.driver._client.put_jobs_batch.assert_not_called()
+
+    def test_job_send(self):
+        self.driver.job_send(msg_id="a")
+        kwargs = self.driver._client.put_job.call_args[1]
+        self.assertEqual(kwargs["target"], "DIRECTORD_SERVER")
+        self.assertEqual(kwargs["identity"], "test-node")
+
+    def test_job_send_batch(self):
+        self.driver.job_send(batch=[{"msg_id": "a"}, {"msg_id": "b"}])
+        self.driver._client.put_job.assert_not_called()
+        batch = self.driver._client.put_jobs_batch.call_args[0][0]
+        self.assertEqual([i["msg_id"] for i in batch], ["a", "b"])
+
+    @patch("directord.drivers.grpcd.MessageServiceClient", autospec=True)
+    def test_backend_init_client_mode(self, mock_client):
+        args, _ = main._args(["--driver", "grpcd", "client"])
+        with patch.object(
+            grpcd.Driver, "get_machine_id"
+        ) as mock_get_machine_id:
+            mock_get_machine_id.return_value = "XXX123"
+            driver = grpcd.Driver(args=args)
+        driver.backend_init()
+        mock_client.assert_called_once_with(
+            ANY, "127.0.0.1", 5558, False, max_in_flight=None
+        )
+
+    @patch("directord.drivers.grpcd.MessageServiceClient", autospec=True)
+    def test_backend_connection_server_mode(self, mock_client):
+        self.driver._client = None
+        self.driver.args.grpc_server_workers = 4
+        self.driver.args.grpc_server_max_queue = 2
+        self.driver._backend_connection()
+        mock_client.assert_called_once_with(
+            ANY, "localhost", 5558, False, max_in_flight=8
+        )
+
+    @patch("grpc.server", autospec=True)
+    def test_backend_bind(self, mock_server):
+        self.driver.args.grpc_bind_address = "127.0.0.1"
+        self.driver.args.grpc_server_workers = 4
+        self.driver.args.grpc_server_max_queue = 2
+        self.driver._backend_bind()
+        mock_server.assert_called_once_with(
+            ANY, options=grpcd._GRPC_OPTS, maximum_concurrent_rpcs=8
+        )
+        mock_server.return_value.start.assert_called_once()
+
+    @patch("grpc.server", autospec=True)
+    def test_backend_bind_unbounded(self, mock_server):
+        self.driver.args.grpc_bind_address = "127.0.0.1"
+        self.driver.args.grpc_server_workers = 4
+        self.driver.args.grpc_server_max_queue = 0
+        self.driver._backend_bind()
+        mock_server.assert_called_once_with(
+            ANY, options=grpcd._GRPC_OPTS, maximum_concurrent_rpcs=None
+        )
+
+    @patch("threading.Event.wait", autospec=True)
+    def test_backend_check(self, mock_wait):
+        data = msg_pb2.MessageData(msg_id="a", data='{"test": 1}')
+        self.driver._client.get_message.return_value = ("test-node", data)
+        self.assertTrue(self.driver.backend_check())
+        self.assertTrue(self.driver.backend_check())
+        self.driver._client.get_message.assert_called_once_with("test-node")
+        self.assertEqual(
+            self.driver.backend_recv(),
+            ["a", "", "", '{"test": 1}', "", "", ""],
+        )
+        self.driver._client.get_message.assert_called_once()
+        mock_wait.assert_not_called()
+
+    @patch("threading.Event.wait", autospec=True)
+    def test_backend_check_empty(self, mock_wait):
+        self.driver._client.get_message.return_value = ("test-node", None)
+        self.assertFalse(self.driver.backend_check())
+        self.assertIsNone(self.driver._pending_message)
+        mock_wait.assert_called_once()
+
+    @patch("threading.Event.wait", autospec=True)
+    def test_backend_check_error(self, mock_wait):
+        self.driver._client.get_message.side_effect = FakeRpcError(
+            grpc.StatusCode.UNAVAILABLE
+        )
+        self.assertFalse(self.driver.backend_check())
+        mock_wait.assert_called_once()
+
+    def test_backend_recv(self):
+        data = msg_pb2.MessageData(msg_id="a")
+        self.driver._client.get_message.return_value = ("test-node", data)
+        self.assertEqual(self.driver.backend_recv()[0], "a")
+        self.driver._client.get_message.assert_called_once_with("test-node")
+
+    @patch("threading.Event.wait", autospec=True)
+    def test_job_check(self, mock_wait):
+        data = msg_pb2.MessageData(identity="test", msg_id="a")
+        self.driver._client.get_job.return_value = ("test-node", data)
+        self.driver.mode = "server"
+        self.assertTrue(self.driver.job_check())
+        self.assertEqual(
+            self.driver.job_recv(), ["test", "a", "", "", "{}", "", "", ""]
+        )
+        self.driver._client.get_job.assert_called_once_with("test-node")
+        self.assertIsNone(self.driver._pending_job)
+        mock_wait.assert_not_called()
+
+    @patch("threading.Event.wait", autospec=True)
+    def test_job_check_empty(self, mock_wait):
+        self.driver._client.get_job.return_value = ("test-node", None)
+        self.assertFalse(self.driver.job_check(constant=100))
+        mock_wait.assert_called_once_with(
+            self.driver._wake["job"], self.driver.timeout
+        )
+        self.assertEqual(self.driver._empty_polls["job"], 1)
+
+    @patch("threading.Event.wait", autospec=True)
+    def test_job_check_backoff(self, mock_wait):
+        self.driver._client.get_job.return_value = ("test-node", None)
+        timeouts = list()
+        for _ in range(7):
+            self.assertFalse(self.driver.job_check(constant=100))
+            timeouts.append(self.driver.timeout)
+        self.assertGreaterEqual(timeouts[0], 0.2 / 16)
+        self.assertLess(timeouts[0], 0.3 / 16)
+        for timeout in timeouts[4:]:
+            self.assertGreaterEqual(timeout, 0.2)
+            self.assertLess(timeout, 0.3)
+        self.assertEqual(self.driver._empty_polls["backend"], 0)
+
+        data = msg_pb2.MessageData(msg_id="a")
+        self.driver._client.get_job.return_value = ("test-node", data)
+        self.assertTrue(self.driver.job_check(constant=100))
+        self.assertEqual(self.driver._empty_polls["job"], 0)
+
+    @patch("threading.Event.wait", autospec=True)
+    def test_poll_wait_floor(self, mock_wait):
+        self.driver._client.get_job.return_value = ("test-node", None)
+        self.driver.job_check(constant=100)
+        self.assertEqual(self.driver._timeout_floor, 0.2)
+        self.driver.job_check(interval=2, constant=500)
+        self.assertEqual(self.driver._timeout_floor, 1.0)
+        self.assertEqual(self.driver._timeout_params, (2, 500))
+
+    def test_wake(self):
+        self.driver.wake("job", target="other-node")
+        self.assertFalse(self.driver._wake["job"].is_set())
+        self.driver.wake("job", target="test-node")
+        self.assertTrue(self.driver._wake["job"].is_set())
+        self.assertFalse(self.driver._wake["backend"].is_set())
+        data = msg_pb2.MessageData(msg_id="a")
+        self.driver._client.get_job.return_value = ("test-node", data)
+        self.assertTrue(self.driver.job_check(constant=100))
+        self.assertFalse(self.driver._wake["job"].is_set())
@@ -190,3 +190,9 @@ class TestUtils(tests.TestConnectionBase):
         uuid2 = utils.get_uuid()
         uuid.UUID(uuid2, version=4)
         self.assertNotEqual(uuid1, uuid2)
+
+    def test_str2bool(self):
+        for value in ["1", "true", "True", "YES", "on", True]:
+            self.assertTrue(utils.str2bool(value))
+        for value in ["0", "false", "False", "no", "", "off", False]:
+            self.assertFalse(utils.str2bool(value))
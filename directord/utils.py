@@ -299,6 +299,22 @@ def get_uuid():
     return str(uuid.uuid4())
 
 
+def str2bool(value):
+    """Return a boolean from a given string value.
+
+    Only "1", "true", "yes" and "on" (case insensitive) are considered
+    True; boolean values are returned as is.
+
+    :param value: Value to convert
+    :type value: String|Boolean
+    :returns: Boolean
+    """
+
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+
 def print_tabulated_data(data, headers):
     """Print data in tabulated form.
 